@@ -1,14 +1,42 @@
 import streamlit as st
-import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime
 import json
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
+import numpy as np
 import io
-import base64
+from xml.sax.saxutils import escape
+import os
+import re
+import logging
+import shelve
+import threading
+import time
+from itertools import combinations
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the standard json parser is used without it
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+@st.cache_resource(show_spinner=False)
+def configure_logging():
+    """Apply PEDIASAFEAI_LOG_LEVEL (e.g. INFO, ERROR) once per process, not on every rerun"""
+    log_level = os.environ.get("PEDIASAFEAI_LOG_LEVEL", "").upper()
+    if not log_level:
+        return
+    # getLevelName maps a known level name to its number; anything else must not stop the app
+    if isinstance(logging.getLevelName(log_level), int):
+        logging.basicConfig(level=log_level)
+    else:
+        logging.basicConfig()
+        logger.warning("Ignoring unknown PEDIASAFEAI_LOG_LEVEL %r, using the default level", log_level)
+
+configure_logging()
 
 # Configure page
 st.set_page_config(
@@ -19,143 +47,128 @@ st.set_page_config(
 )
 
 # Custom CSS for styling
-st.markdown("""
-<style>
-.main-header {
-    text-align: center;
-    padding: 3rem 1rem;
-    background: linear-gradient(135deg, #1e3c72 0%, #2a5298 50%, #ffffff 100%);
-    color: white;
-    margin: -1rem -1rem 3rem -1rem;
-    border-radius: 0 0 20px 20px;
-    box-shadow: 0 4px 15px rgba(30, 60, 114, 0.3);
-}
-
-.app-title {
-    font-size: 3.5rem;
-    font-weight: bold;
-    margin-bottom: 1rem;
-    text-shadow: 2px 2px 4px rgba(0,0,0,0.3);
-}
-
-.credentials {
-    font-size: 1.3rem;
-    font-style: italic;
-    margin-bottom: 1.5rem;
-    opacity: 0.95;
-}
-
-.description {
-    font-size: 1.2rem;
-    max-width: 900px;
-    margin: 0 auto;
-    line-height: 1.7;
-    opacity: 0.9;
-}
-
-.enter-button {
-    text-align: center;
-    margin: 3rem 0;
-}
-
-.input-section {
-    background: linear-gradient(145deg, #f8fbff 0%, #e8f4fd 100%);
-    padding: 2rem;
-    border-radius: 15px;
-    margin-bottom: 2rem;
-    border: 2px solid #c3d9ff;
-    box-shadow: 0 4px 10px rgba(30, 60, 114, 0.1);
-}
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+STYLESHEET_FILE = os.path.join(APP_DIR, "static", "style.css")
 
-.input-section h3 {
-    color: #1e3c72;
-    margin-bottom: 1.5rem;
-    font-weight: 600;
-}
-
-.screening-results-header {
-    text-align: center;
-    font-size: 2.5rem;
-    color: #1e3c72;
-    margin: 3rem 0;
-    font-weight: 600;
-}
-
-.metrics-container {
-    margin: 2rem 0 3rem 0;
-}
-
-.tabs-container {
-    margin: 2rem 0;
-}
-
-.result-card {
-    background: white;
-    padding: 2rem;
-    border-radius: 12px;
-    box-shadow: 0 4px 12px rgba(0,0,0,0.08);
-    margin-bottom: 2rem;
-    border-left: 5px solid #dc3545;
-}
-
-.result-card.warning {
-    border-left-color: #ffc107;
-}
-
-.result-card.success {
-    border-left-color: #28a745;
-}
-
-.footer {
-    text-align: center;
-    padding: 2rem;
-    background: linear-gradient(145deg, #f0f7ff 0%, #e0efff 100%);
-    margin: 3rem -1rem -1rem -1rem;
-    border-top: 3px solid #c3d9ff;
-    color: #1e3c72;
-    font-weight: 500;
-}
+@st.cache_resource
+def load_css():
+    """Read the app stylesheet from disk once per process"""
+    with open(STYLESHEET_FILE, encoding="utf-8") as f:
+        return f"<style>\n{f.read()}</style>"
 
-.disclaimer-container {
-    text-align: center;
-    margin: 3rem 0 2rem 0;
-}
+st.markdown(load_css(), unsafe_allow_html=True)
 
-.disclaimer-content {
-    background: linear-gradient(145deg, #fff8e1 0%, #ffecb3 100%);
-    border: 2px solid #ffcc02;
-    border-radius: 10px;
-    padding: 1.5rem;
-    margin: 1rem auto;
-    max-width: 800px;
-    text-align: left;
-}
+# Screening criteria data
+CRITERIA_FILE = os.path.join(APP_DIR, "data", "criteria.json")
 
-.download-section {
-    margin: 3rem 0;
-    padding: 2rem;
-    background: linear-gradient(145deg, #f0f7ff 0%, #e8f4fd 100%);
-    border-radius: 15px;
-    border: 2px solid #c3d9ff;
-}
+@st.cache_data(show_spinner=False)
+def load_criteria():
+    """Load the POPI, PIPc and KIDs list tables from the criteria file once per process"""
+    with open(CRITERIA_FILE, encoding="utf-8") as f:
+        return json.load(f)
 
-.stButton > button {
-    background: linear-gradient(145deg, #1e3c72 0%, #2a5298 100%);
-    color: white;
-    font-weight: bold;
-    border: none;
-    padding: 0.7rem 2rem;
-    border-radius: 8px;
-    font-size: 1.1rem;
-}
+# Medication and condition lists (built once at import and shared by every rerun)
+COMMON_MEDICATIONS = (
+    # Analgesics and Antipyretics
+    "Paracetamol/Acetaminophen", "Ibuprofen", "Aspirin", "Codeine", "Tramadol", "Morphine",
+    "Diclofenac", "Naproxen", "Celecoxib", "Indomethacin",
+    
+    # Antibiotics
+    "Amoxicillin", "Amoxicillin/Clavulanate", "Azithromycin", "Clarithromycin", "Erythromycin",
+    "Cephalexin", "Cefuroxime", "Ceftriaxone", "Ciprofloxacin", "Levofloxacin", "Clindamycin",
+    "Vancomycin", "Gentamicin", "Tobramycin", "Cotrimoxazole/TMP-SMX",
+    
+    # Respiratory Medications
+    "Salbutamol", "Terbutaline", "Fluticasone", "Budesonide", "Beclomethasone", "Montelukast",
+    "Theophylline", "Prednisolone", "Dexamethasone", "Ipratropium", "Tiotropium",
+    
+    # Antihistamines and Allergy
+    "Cetirizine", "Loratadine", "Fexofenadine", "Diphenhydramine", "Chlorpheniramine",
+    "Promethazine", "Hydroxyzine", "Desloratadine", "Levocetirizine",
+    
+    # Cough and Cold
+    "Dextromethorphan", "Guaifenesin", "Pseudoephedrine", "Phenylephrine",
+    
+    # Gastrointestinal
+    "Omeprazole", "Lansoprazole", "Ranitidine", "Famotidine", "Domperidone", "Metoclopramide",
+    "Ondansetron", "Loperamide", "Lactulose", "Polyethylene glycol", "Simethicone",
+    
+    # Neurological and Psychiatric
+    "Methylphenidate", "Amphetamine", "Atomoxetine", "Risperidone", "Aripiprazole",
+    "Phenytoin", "Carbamazepine", "Valproic acid", "Levetiracetam", "Lamotrigine",
+    "Clonazepam", "Diazepam", "Lorazepam",
+    
+    # Cardiovascular
+    "Digoxin", "Furosemide", "Spironolactone", "Captopril", "Enalapril", "Amlodipine",
+    "Propranolol", "Atenolol", "Metoprolol",
+    
+    # Endocrine
+    "Insulin", "Metformin", "Levothyroxine", "Prednisolone", "Hydrocortisone",
+    
+    # Dermatological
+    "Hydrocortisone cream", "Betamethasone", "Calamine lotion", "Mupirocin",
+    "Clotrimazole", "Nystatin", "Acyclovir",
+    
+    # Ophthalmological
+    "Chloramphenicol eye drops", "Tobramycin eye drops", "Prednisolone eye drops",
+    
+    # Miscellaneous
+    "Iron supplements", "Folic acid", "Vitamin D", "Multivitamins", "Zinc supplements",
+    "ORS (Oral Rehydration Solution)", "Hyoscine", "Atropine", "Glycerin suppository"
+)
 
-.stButton > button:hover {
-    background: linear-gradient(145deg, #2a5298 0%, #1e3c72 100%);
-    transform: translateY(-2px);
-    box-shadow: 0 4px 12px rgba(30, 60, 114, 0.3);
-}
-</style>
-""", unsafe_allow_html=True)
+COMMON_CONDITIONS = (
+    # Respiratory Conditions
+    "Upper respiratory tract infection", "Asthma", "Bronchiolitis", "Pneumonia", 
+    "Croup", "Chronic cough", "Allergic rhinitis", "Sinusitis",
+    
+    # Infectious Diseases
+    "Acute otitis media", "Pharyngitis/Tonsillitis", "Urinary tract infection",
+    "Gastroenteritis", "Skin and soft tissue infection", "Meningitis", "Sepsis",
+    "Conjunctivitis", "Impetigo", "Cellulitis",
+    
+    # Gastrointestinal Disorders
+    "GERD (Gastroesophageal reflux disease)", "Constipation", "Diarrhea", 
+    "Inflammatory bowel disease", "Peptic ulcer disease", "Nausea and vomiting",
+    "Abdominal pain", "Food poisoning",
+    
+    # Neurological and Psychiatric
+    "ADHD (Attention Deficit Hyperactivity Disorder)", "Seizure disorder", "Epilepsy",
+    "Febrile seizures", "Migraine", "Headache", "Autism spectrum disorder",
+    "Anxiety disorder", "Depression", "Sleep disorders",
+    
+    # Allergic and Immunological
+    "Eczema/Atopic dermatitis", "Food allergies", "Drug allergies", "Anaphylaxis",
+    "Allergic conjunctivitis", "Contact dermatitis",
+    
+    # Endocrine and Metabolic
+    "Type 1 Diabetes", "Type 2 Diabetes", "Hypothyroidism", "Hyperthyroidism",
+    "Growth hormone deficiency", "Obesity", "Failure to thrive",
+    
+    # Cardiovascular
+    "Congenital heart disease", "Hypertension", "Arrhythmias", "Heart failure",
+    "Kawasaki disease", "Rheumatic fever",
+    
+    # Hematological and Oncological
+    "Iron deficiency anemia", "Sickle cell disease", "Thalassemia", "Leukemia",
+    "Lymphoma", "Bleeding disorders",
+    
+    # Musculoskeletal
+    "Juvenile idiopathic arthritis", "Fractures", "Sprains and strains",
+    "Muscular dystrophy", "Osteomyelitis",
+    
+    # Genitourinary
+    "Nephrotic syndrome", "Chronic kidney disease", "Vesicoureteral reflux",
+    "Enuresis (bedwetting)", "Urinary incontinence",
+    
+    # Dermatological
+    "Diaper dermatitis", "Seborrheic dermatitis", "Psoriasis", "Acne",
+    "Fungal infections", "Viral exanthems", "Scabies",
+    
+    # Others
+    "Fever of unknown origin", "Pain management", "Palliative care",
+    "Immunization reactions", "Poisoning/Overdose", "Burns"
+)
 
 # Database classes
 class PediatricDrugDatabase:
@@ -165,339 +178,399 @@ class PediatricDrugDatabase:
         self.kids_list = self._load_kids_list()
         self.common_medications = self._load_common_medications()
         self.common_conditions = self._load_common_conditions()
+        # Condition selectbox choices with a leading blank entry, built once instead of per rerun
+        self.condition_options = ("",) + self.common_conditions
+        self.medication_lookup = self._build_name_lookup(self.common_medications)
+        self.condition_lookup = self._build_name_lookup(self.common_conditions)
+        self.inappropriate_criteria = self.popi_criteria["inappropriate"] + self.kids_list["inappropriate"]
+        self.inappropriate_index = self._build_inappropriate_index()
+        self.inappropriate_thresholds = self._build_inappropriate_thresholds()
+        self.omission_criteria = self.pipc_criteria["omissions"]
+        # Required alternatives per omission, split and casefolded once
+        self.omission_required = [
+            tuple(req_med.casefold() for req_med in c["missing_medication"].split(" or "))
+            for c in self.omission_criteria
+        ]
+        self.omission_index = self._build_omission_index()
+        # Criteria rows for every listed medication keyed by its display name, so common
+        # selections need one dict lookup and no case folding at screening time
+        self.inappropriate_rows = {
+            med: self._match_inappropriate_rows(med.casefold()) for med in self.common_medications
+        }
+        # Likewise the omission rows that apply to every listed condition
+        self.omission_rows = {
+            condition: self._match_omission_rows(condition.casefold()) for condition in self.common_conditions
+        }
 
     def _load_popi_criteria(self):
         """POPI (Pediatrics: Omission of Prescriptions and Inappropriate prescriptions) criteria"""
-        return {
-            "inappropriate": [
-                {
-                    "medication": "Aspirin",
-                    "age_restriction": "< 16 years",
-                    "condition": "Any condition except Kawasaki disease",
-                    "rationale": "Risk of Reye's syndrome in children under 16 years",
-                    "reference": "POPI explicit criteria - Reye's syndrome prevention"
-                },
-                {
-                    "medication": "Codeine",
-                    "age_restriction": "< 12 years",
-                    "condition": "Pain management or cough suppression",
-                    "rationale": "Risk of serious respiratory depression due to variable CYP2D6 metabolism",
-                    "reference": "FDA Safety Communication 2013, POPI criteria"
-                },
-                {
-                    "medication": "Tramadol",
-                    "age_restriction": "< 12 years",
-                    "condition": "Pain management",
-                    "rationale": "Risk of serious respiratory depression, especially in ultra-rapid CYP2D6 metabolizers",
-                    "reference": "FDA Safety Communication 2017, POPI criteria"
-                },
-                {
-                    "medication": "Diphenhydramine",
-                    "age_restriction": "< 2 years",
-                    "condition": "Any condition",
-                    "rationale": "Risk of anticholinergic toxicity and paradoxical excitation in infants",
-                    "reference": "POPI explicit criteria, AAP recommendations"
-                },
-                {
-                    "medication": "Promethazine",
-                    "age_restriction": "< 2 years",
-                    "condition": "Any condition",
-                    "rationale": "Risk of severe respiratory depression and death",
-                    "reference": "FDA Black Box Warning, POPI criteria"
-                },
-                {
-                    "medication": "Dextromethorphan",
-                    "age_restriction": "< 4 years",
-                    "condition": "Cough",
-                    "rationale": "Limited efficacy and potential for serious adverse effects including respiratory depression",
-                    "reference": "AAP Clinical Report 2008, POPI criteria"
-                },
-                {
-                    "medication": "Pseudoephedrine",
-                    "age_restriction": "< 4 years",
-                    "condition": "Nasal congestion",
-                    "rationale": "Risk of cardiovascular and CNS adverse effects with minimal efficacy",
-                    "reference": "POPI criteria, FDA recommendations"
-                },
-                {
-                    "medication": "Phenylephrine",
-                    "age_restriction": "< 4 years",
-                    "condition": "Nasal congestion",
-                    "rationale": "Risk of hypertension and cardiovascular effects in young children",
-                    "reference": "POPI explicit criteria"
-                },
-                {
-                    "medication": "Loperamide",
-                    "age_restriction": "< 2 years",
-                    "condition": "Diarrhea",
-                    "rationale": "Risk of paralytic ileus and CNS depression in young children",
-                    "reference": "POPI criteria, WHO recommendations"
-                },
-                {
-                    "medication": "Metoclopramide",
-                    "age_restriction": "< 1 year",
-                    "condition": "Any condition",
-                    "rationale": "Risk of extrapyramidal symptoms and tardive dyskinesia",
-                    "reference": "POPI explicit criteria, EMA recommendations"
-                }
-            ]
-        }
+        return load_criteria()["popi_criteria"]
 
     def _load_pipc_criteria(self):
         """Pediatric Inappropriate Prescribing Criteria - Comprehensive omissions list"""
-        return {
-            "omissions": [
-                {
-                    "condition": "Asthma",
-                    "missing_medication": "Short-acting beta-2 agonist (Salbutamol)",
-                    "rationale": "Essential rescue medication for acute bronchospasm in all asthma patients",
-                    "reference": "GINA Guidelines 2023, PIPc criteria"
-                },
-                {
-                    "condition": "ADHD",
-                    "missing_medication": "Methylphenidate or Amphetamine",
-                    "rationale": "First-line pharmacological treatment for ADHD in children over 6 years",
-                    "reference": "AAP Clinical Practice Guidelines, PIPc criteria"
-                },
-                {
-                    "condition": "Seizure disorder",
-                    "missing_medication": "Anti-epileptic drug",
-                    "rationale": "Essential for seizure prevention and control to prevent status epilepticus",
-                    "reference": "ILAE Guidelines, PIPc criteria"
-                },
-                {
-                    "condition": "Epilepsy",
-                    "missing_medication": "Anti-epileptic drug",
-                    "rationale": "Mandatory for seizure control and prevention of neurological damage",
-                    "reference": "ILAE Guidelines, PIPc criteria"
-                },
-                {
-                    "condition": "Type 1 Diabetes",
-                    "missing_medication": "Insulin",
-                    "rationale": "Life-essential hormone replacement therapy for survival",
-                    "reference": "ADA Pediatric Guidelines, PIPc criteria"
-                },
-                {
-                    "condition": "Bacterial pneumonia",
-                    "missing_medication": "Appropriate antibiotic",
-                    "rationale": "Essential for treating bacterial infection and preventing complications",
-                    "reference": "WHO pneumonia guidelines, PIPc criteria"
-                },
-                {
-                    "condition": "Urinary tract infection",
-                    "missing_medication": "Appropriate antibiotic",
-                    "rationale": "Necessary to prevent progression to pyelonephritis and sepsis",
-                    "reference": "AAP UTI guidelines, PIPc criteria"
-                },
-                {
-                    "condition": "Iron deficiency anemia",
-                    "missing_medication": "Iron supplements",
-                    "rationale": "Essential for correction of iron deficiency and anemia",
-                    "reference": "AAP anemia guidelines, PIPc criteria"
-                },
-                {
-                    "condition": "Congenital hypothyroidism",
-                    "missing_medication": "Levothyroxine",
-                    "rationale": "Critical for normal growth and neurodevelopment",
-                    "reference": "AAP thyroid guidelines, PIPc criteria"
-                },
-                {
-                    "condition": "Severe allergic reaction",
-                    "missing_medication": "Epinephrine",
-                    "rationale": "Life-saving treatment for anaphylaxis",
-                    "reference": "Anaphylaxis guidelines, PIPc criteria"
-                }
-            ]
-        }
+        return load_criteria()["pipc_criteria"]
 
     def _load_kids_list(self):
         """KIDs List (Key potentially Inappropriate Drugs) - Comprehensive criteria"""
-        return {
-            "inappropriate": [
-                {
-                    "medication": "Chlorpheniramine",
-                    "age_restriction": "< 2 years",
-                    "condition": "Allergic conditions",
-                    "rationale": "Risk of CNS depression and anticholinergic effects in young children",
-                    "reference": "KIDs List criteria, FDA recommendations"
-                },
-                {
-                    "medication": "Hyoscine",
-                    "age_restriction": "< 6 months",
-                    "condition": "Any condition",
-                    "rationale": "Risk of anticholinergic toxicity in young infants",
-                    "reference": "KIDs List criteria"
-                },
-                {
-                    "medication": "Atropine",
-                    "age_restriction": "< 6 months",
-                    "condition": "Non-emergency use",
-                    "rationale": "Risk of anticholinergic toxicity and hyperthermia in infants",
-                    "reference": "KIDs List criteria"
-                },
-                {
-                    "medication": "Domperidone",
-                    "age_restriction": "< 12 years with cardiac conditions",
-                    "condition": "Cardiac arrhythmias present",
-                    "rationale": "Risk of QT prolongation and sudden cardiac death",
-                    "reference": "KIDs List criteria, EMA warnings"
-                },
-                {
-                    "medication": "Erythromycin",
-                    "age_restriction": "< 2 weeks",
-                    "condition": "Any condition",
-                    "rationale": "Risk of pyloric stenosis in young infants",
-                    "reference": "KIDs List criteria, FDA warnings"
-                },
-                {
-                    "medication": "Ciprofloxacin",
-                    "age_restriction": "< 18 years",
-                    "condition": "Non-severe infections",
-                    "rationale": "Risk of arthropathy and tendon damage in growing children",
-                    "reference": "KIDs List criteria, FDA Black Box Warning"
-                },
-                {
-                    "medication": "Levofloxacin",
-                    "age_restriction": "< 18 years",
-                    "condition": "Non-severe infections",
-                    "rationale": "Risk of arthropathy and tendon damage in pediatric patients",
-                    "reference": "KIDs List criteria, FDA warnings"
-                },
-                {
-                    "medication": "Tetracycline",
-                    "age_restriction": "< 8 years",
-                    "condition": "Any condition",
-                    "rationale": "Risk of permanent tooth discoloration and enamel hypoplasia",
-                    "reference": "KIDs List criteria, standard pediatric references"
-                },
-                {
-                    "medication": "Doxycycline",
-                    "age_restriction": "< 8 years",
-                    "condition": "Any condition except life-threatening infections",
-                    "rationale": "Risk of permanent tooth discoloration and impaired bone growth",
-                    "reference": "KIDs List criteria, AAP recommendations"
-                },
-                {
-                    "medication": "Amiodarone",
-                    "age_restriction": "All ages",
-                    "condition": "First-line antiarrhythmic use",
-                    "rationale": "Multiple serious adverse effects including thyroid, pulmonary, and hepatic toxicity",
-                    "reference": "KIDs List criteria, pediatric cardiology guidelines"
-                }
-            ]
-        }
+        return load_criteria()["kids_list"]
 
     def _load_common_medications(self):
         """Comprehensive list of pediatric medications from POPI, PIPc, and KIDs list"""
-        return [
-            # Analgesics and Antipyretics
-            "Paracetamol/Acetaminophen", "Ibuprofen", "Aspirin", "Codeine", "Tramadol", "Morphine",
-            "Diclofenac", "Naproxen", "Celecoxib", "Indomethacin",
-            
-            # Antibiotics
-            "Amoxicillin", "Amoxicillin/Clavulanate", "Azithromycin", "Clarithromycin", "Erythromycin",
-            "Cephalexin", "Cefuroxime", "Ceftriaxone", "Ciprofloxacin", "Levofloxacin", "Clindamycin",
-            "Vancomycin", "Gentamicin", "Tobramycin", "Cotrimoxazole/TMP-SMX",
-            
-            # Respiratory Medications
-            "Salbutamol", "Terbutaline", "Fluticasone", "Budesonide", "Beclomethasone", "Montelukast",
-            "Theophylline", "Prednisolone", "Dexamethasone", "Ipratropium", "Tiotropium",
-            
-            # Antihistamines and Allergy
-            "Cetirizine", "Loratadine", "Fexofenadine", "Diphenhydramine", "Chlorpheniramine",
-            "Promethazine", "Hydroxyzine", "Desloratadine", "Levocetirizine",
-            
-            # Cough and Cold
-            "Dextromethorphan", "Guaifenesin", "Pseudoephedrine", "Phenylephrine",
-            
-            # Gastrointestinal
-            "Omeprazole", "Lansoprazole", "Ranitidine", "Famotidine", "Domperidone", "Metoclopramide",
-            "Ondansetron", "Loperamide", "Lactulose", "Polyethylene glycol", "Simethicone",
-            
-            # Neurological and Psychiatric
-            "Methylphenidate", "Amphetamine", "Atomoxetine", "Risperidone", "Aripiprazole",
-            "Phenytoin", "Carbamazepine", "Valproic acid", "Levetiracetam", "Lamotrigine",
-            "Clonazepam", "Diazepam", "Lorazepam",
-            
-            # Cardiovascular
-            "Digoxin", "Furosemide", "Spironolactone", "Captopril", "Enalapril", "Amlodipine",
-            "Propranolol", "Atenolol", "Metoprolol",
-            
-            # Endocrine
-            "Insulin", "Metformin", "Levothyroxine", "Prednisolone", "Hydrocortisone",
-            
-            # Dermatological
-            "Hydrocortisone cream", "Betamethasone", "Calamine lotion", "Mupirocin",
-            "Clotrimazole", "Nystatin", "Acyclovir",
-            
-            # Ophthalmological
-            "Chloramphenicol eye drops", "Tobramycin eye drops", "Prednisolone eye drops",
-            
-            # Miscellaneous
-            "Iron supplements", "Folic acid", "Vitamin D", "Multivitamins", "Zinc supplements",
-            "ORS (Oral Rehydration Solution)", "Hyoscine", "Atropine", "Glycerin suppository"
-        ]
+        return COMMON_MEDICATIONS
 
     def _load_common_conditions(self):
         """Comprehensive list of pediatric conditions from POPI, PIPc, and KIDs list"""
-        return [
-            # Respiratory Conditions
-            "Upper respiratory tract infection", "Asthma", "Bronchiolitis", "Pneumonia", 
-            "Croup", "Chronic cough", "Allergic rhinitis", "Sinusitis",
-            
-            # Infectious Diseases
-            "Acute otitis media", "Pharyngitis/Tonsillitis", "Urinary tract infection",
-            "Gastroenteritis", "Skin and soft tissue infection", "Meningitis", "Sepsis",
-            "Conjunctivitis", "Impetigo", "Cellulitis",
-            
-            # Gastrointestinal Disorders
-            "GERD (Gastroesophageal reflux disease)", "Constipation", "Diarrhea", 
-            "Inflammatory bowel disease", "Peptic ulcer disease", "Nausea and vomiting",
-            "Abdominal pain", "Food poisoning",
-            
-            # Neurological and Psychiatric
-            "ADHD (Attention Deficit Hyperactivity Disorder)", "Seizure disorder", "Epilepsy",
-            "Febrile seizures", "Migraine", "Headache", "Autism spectrum disorder",
-            "Anxiety disorder", "Depression", "Sleep disorders",
-            
-            # Allergic and Immunological
-            "Eczema/Atopic dermatitis", "Food allergies", "Drug allergies", "Anaphylaxis",
-            "Allergic conjunctivitis", "Contact dermatitis",
-            
-            # Endocrine and Metabolic
-            "Type 1 Diabetes", "Type 2 Diabetes", "Hypothyroidism", "Hyperthyroidism",
-            "Growth hormone deficiency", "Obesity", "Failure to thrive",
-            
-            # Cardiovascular
-            "Congenital heart disease", "Hypertension", "Arrhythmias", "Heart failure",
-            "Kawasaki disease", "Rheumatic fever",
-            
-            # Hematological and Oncological
-            "Iron deficiency anemia", "Sickle cell disease", "Thalassemia", "Leukemia",
-            "Lymphoma", "Bleeding disorders",
-            
-            # Musculoskeletal
-            "Juvenile idiopathic arthritis", "Fractures", "Sprains and strains",
-            "Muscular dystrophy", "Osteomyelitis",
-            
-            # Genitourinary
-            "Nephrotic syndrome", "Chronic kidney disease", "Vesicoureteral reflux",
-            "Enuresis (bedwetting)", "Urinary incontinence",
-            
-            # Dermatological
-            "Diaper dermatitis", "Seborrheic dermatitis", "Psoriasis", "Acne",
-            "Fungal infections", "Viral exanthems", "Scabies",
+        return COMMON_CONDITIONS
+
+    def _build_name_lookup(self, names):
+        """Map case-folded names to their display form for O(1) membership tests"""
+        return {name.casefold(): name for name in names}
+
+    def canonical_medication(self, name):
+        """Return the listed spelling of a typed medication, or the name unchanged"""
+        return self.medication_lookup.get(name.casefold(), name)
+
+    def canonical_condition(self, name):
+        """Return the listed spelling of a typed condition, or the name unchanged"""
+        return self.condition_lookup.get(name.casefold(), name)
+
+    def _build_inappropriate_thresholds(self):
+        """Parse each POPI and KIDs list age limit once into a float array for a one-comparison age mask"""
+        thresholds = np.array(
+            [age_restriction_threshold(c["age_restriction"]) for c in self.inappropriate_criteria],
+            dtype=float
+        )
+        # Criteria with no numeric limit (e.g. "All ages") become -inf so, as before, they never match
+        thresholds[np.isnan(thresholds)] = -np.inf
+        return thresholds
+
+    def _build_omission_index(self):
+        """Group omission criteria positions by casefolded condition"""
+        index = {}
+        for position, criterion in enumerate(self.omission_criteria):
+            index.setdefault(criterion["condition"].casefold(), []).append(position)
+        return index
+
+    def _match_omission_rows(self, indication_cf):
+        """Return the omission positions whose condition occurs in a casefolded indication"""
+        rows = []
+        for condition, positions in self.omission_index.items():
+            if condition in indication_cf:
+                rows.extend(positions)
+        return sorted(rows)  # keep criteria order
+
+    def _build_inappropriate_index(self):
+        """Group inappropriate-use criteria positions by casefolded medication name"""
+        index = {}
+        for position, criterion in enumerate(self.inappropriate_criteria):
+            index.setdefault(criterion["medication"].casefold(), []).append(position)
+        return index
+
+    def _match_inappropriate_rows(self, med_cf):
+        """Return the criteria rows whose medication name occurs in a casefolded medication"""
+        rows = []
+        for name, positions in self.inappropriate_index.items():
+            if name in med_cf:
+                rows.extend(positions)
+        return sorted(rows)  # keep criteria order (POPI before KIDs list)
+
+    def find_inappropriate(self, medications, age_in_years):
+        """Return the POPI and KIDs list criteria triggered by the medications at this age"""
+        # The age mask does not depend on the medication, so build it once
+        age_mask = age_in_years < self.inappropriate_thresholds
+        
+        inappropriate_meds = []
+        seen = set()  # a criterion hit by two medications, or listed twice, is reported once
+        for med in medications:
+            rows = self.inappropriate_rows.get(med)
+            if rows is None:  # custom entry, scan the distinct criteria names once
+                rows = self._match_inappropriate_rows(med.casefold())
+            for position in rows:
+                if age_mask[position]:
+                    criterion = self.inappropriate_criteria[position]
+                    key = (criterion["medication"], criterion["age_restriction"], criterion["rationale"])
+                    if key not in seen:
+                        seen.add(key)
+                        inappropriate_meds.append(criterion)
+        return inappropriate_meds
+
+    def find_omissions(self, indication, medications):
+        """Return the PIPc omissions for the indication that none of the medications covers"""
+        rows = self.omission_rows.get(indication)
+        if rows is None:  # custom indication, scan the distinct conditions once
+            rows = self._match_omission_rows(indication.casefold())
+        if not rows:
+            return []
+        
+        meds_cf = [med.casefold() for med in medications]
+        omissions = []
+        seen = set()
+        for position in rows:
+            if not any(req_med in med_cf for med_cf in meds_cf for req_med in self.omission_required[position]):
+                criterion = self.omission_criteria[position]
+                key = (criterion["condition"], criterion["missing_medication"], criterion["rationale"])
+                if key not in seen:
+                    seen.add(key)
+                    omissions.append(criterion)
+        return omissions
+
+@st.cache_resource
+def get_drug_db():
+    """Build the pediatric drug database once per process and share it across sessions"""
+    return PediatricDrugDatabase()
+
+# Known critical interactions database (for immediate results). Each key is the
+# pair of normalized drug names in alphabetical order, so a lookup is one dict probe.
+CRITICAL_INTERACTIONS = {
+    ("aspirin", "warfarin"): {
+        "severity": "Major",
+        "mechanism": "Increased bleeding risk due to additive antiplatelet and anticoagulant effects",
+        "management": "Avoid concurrent use or monitor closely with frequent INR checks and bleeding assessment",
+        "clinical_significance": "High risk of major bleeding events"
+    },
+    ("amiodarone", "digoxin"): {
+        "severity": "Major",
+        "mechanism": "Amiodarone inhibits P-glycoprotein, increasing digoxin serum levels up to 2-fold",
+        "management": "Reduce digoxin dose by 50% and monitor serum digoxin levels closely",
+        "clinical_significance": "Risk of digoxin toxicity with cardiac arrhythmias"
+    },
+    ("carbamazepine", "phenytoin"): {
+        "severity": "Major",
+        "mechanism": "Mutual induction of hepatic enzymes leading to decreased efficacy of both drugs",
+        "management": "Monitor seizure control and consider dose adjustments or alternative therapy",
+        "clinical_significance": "Loss of seizure control in epileptic patients"
+    },
+    ("methotrexate", "trimethoprim"): {
+        "severity": "Major", 
+        "mechanism": "Both drugs inhibit folate metabolism, leading to additive bone marrow suppression",
+        "management": "Avoid combination or increase folate supplementation with close monitoring",
+        "clinical_significance": "Severe pancytopenia and immunosuppression"
+    },
+    ("ciprofloxacin", "theophylline"): {
+        "severity": "Major",
+        "mechanism": "Ciprofloxacin inhibits CYP1A2, reducing theophylline clearance by up to 30%",
+        "management": "Reduce theophylline dose by 50% and monitor serum levels",
+        "clinical_significance": "Risk of theophylline toxicity with seizures and cardiac arrhythmias"
+    },
+    ("corticosteroids", "insulin"): {
+        "severity": "Moderate",
+        "mechanism": "Corticosteroids increase blood glucose through gluconeogenesis and insulin resistance",
+        "management": "Monitor blood glucose closely and adjust insulin dosing as needed",
+        "clinical_significance": "Loss of glycemic control in diabetic patients"
+    },
+    ("acetaminophen", "warfarin"): {
+        "severity": "Moderate",
+        "mechanism": "High-dose acetaminophen may enhance anticoagulant effect of warfarin",
+        "management": "Limit acetaminophen to <2g/day and monitor INR more frequently",
+        "clinical_significance": "Increased bleeding risk with chronic high-dose use"
+    },
+    ("clopidogrel", "omeprazole"): {
+        "severity": "Moderate",
+        "mechanism": "Omeprazole inhibits CYP2C19, reducing conversion of clopidogrel to active metabolite",
+        "management": "Consider alternative PPI (pantoprazole) or H2 blocker",
+        "clinical_significance": "Reduced antiplatelet effect increasing cardiovascular risk"
+    }
+}
+
+# OpenFDA API helpers
+OPENFDA_BASE_URL = "https://api.fda.gov/drug"
+OPENFDA_ADVERSE_EVENTS_URL = f"{OPENFDA_BASE_URL}/event.json"
+OPENFDA_DRUG_LABELS_URL = f"{OPENFDA_BASE_URL}/label.json"
+OPENFDA_TIMEOUT = (2, 4)  # (connect, read) seconds, so a slow endpoint cannot stall the page
+OPENFDA_MAX_WORKERS = 8  # concurrent pair lookups, kept below the session pool size
+OPENFDA_LOOKUP_TIMEOUT = 30  # seconds allowed for all pair lookups of one screening
+OPENFDA_COUNT_LIMIT = 1000  # largest number of buckets an OpenFDA count query returns
+OPENFDA_UNREPORTED_TTL = 604800  # seconds a drug with no adverse event reports stays ruled out
+# Pair lookups also persist on disk so restarts and other sessions skip the network;
+# set PEDIASAFEAI_CACHE_DIR to relocate the store
+OPENFDA_CACHE_DIR = os.environ.get("PEDIASAFEAI_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".pediasafeai"))
+OPENFDA_DISK_CACHE_TTL = 7 * 86400  # seconds a stored pair lookup stays valid
+
+def parse_fda_response(response):
+    """Decode an OpenFDA JSON response, using the faster orjson parser when installed"""
+    if orjson is not None:
+        try:
+            return orjson.loads(response.content)
+        except orjson.JSONDecodeError:
+            pass  # let requests raise its own error, which callers already handle
+    return response.json()
+
+@st.cache_resource(show_spinner=False)
+def get_fda_session():
+    """Create a pooled HTTP session shared by all OpenFDA requests"""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=20,
+        max_retries=Retry(
+            total=1,
+            connect=1,
+            read=1,
+            backoff_factor=0.2,
+            status_forcelist=[429, 500, 502, 503, 504]
+        )
+    )
+    session.mount("https://", adapter)
+    session.headers.update({"Accept": "application/json", "User-Agent": "PediaSafeAI"})
+    return session
+
+@st.cache_resource(show_spinner=False)
+def get_fda_disk_cache():
+    """Open the persistent pair lookup store once per process, or None if it cannot be created"""
+    try:
+        os.makedirs(OPENFDA_CACHE_DIR, exist_ok=True)
+        return shelve.open(os.path.join(OPENFDA_CACHE_DIR, "fda_interactions"))
+    except Exception as e:
+        logger.warning("OpenFDA disk cache unavailable, using the in-memory cache only: %s", e)
+        return None
+
+@st.cache_resource(show_spinner=False)
+def get_fda_disk_cache_lock():
+    """Process-wide lock for the shelf, which is not thread-safe and is used from the lookup pool"""
+    return threading.Lock()
+
+def read_fda_disk_cache(key):
+    """Return the stored lookup for key if it is still fresh, otherwise None"""
+    cache = get_fda_disk_cache()
+    if cache is None:
+        return None
+    try:
+        with get_fda_disk_cache_lock():
+            entry = cache.get(key)
+            if entry is not None and time.time() - entry[0] > OPENFDA_DISK_CACHE_TTL:
+                # Drop expired entries so the store does not grow without bound
+                del cache[key]
+                cache.sync()
+                entry = None
+    except Exception as e:
+        logger.warning("OpenFDA disk cache read failed for %s: %s", key, e)
+        return None
+    if entry is None:
+        return None
+    return entry[1]
+
+def write_fda_disk_cache(key, result):
+    """Store a lookup result with the time it was fetched"""
+    cache = get_fda_disk_cache()
+    if cache is None:
+        return
+    try:
+        with get_fda_disk_cache_lock():
+            cache[key] = (time.time(), result)
+            cache.sync()
+    except Exception as e:
+        logger.warning("OpenFDA disk cache write failed for %s: %s", key, e)
+
+@st.cache_data(ttl=86400, max_entries=2048, show_spinner=False)
+def fetch_fda_interactions(drug1_norm, drug2_norm):
+    """Fetch adverse events co-reported for a normalized drug pair (cached for a day, on disk for a week)"""
+    disk_key = f"{drug1_norm}\x1f{drug2_norm}"
+    result = read_fda_disk_cache(disk_key)
+    if result is not None:
+        return result
+    
+    # Search for adverse events involving both drugs
+    search_query = f'patient.drug.medicinalproduct:"{drug1_norm}"+AND+patient.drug.medicinalproduct:"{drug2_norm}"'
+    
+    params = {
+        'search': search_query,
+        'count': 'patient.reaction.reactionmeddrapt.exact',
+        'limit': 10
+    }
+    
+    response = get_fda_session().get(OPENFDA_ADVERSE_EVENTS_URL, params=params, timeout=OPENFDA_TIMEOUT)
+    
+    # OpenFDA answers 404 when nothing matches; any other failure raises so it is not cached
+    result = {'found': False}
+    if response.status_code != 404:
+        response.raise_for_status()
+        
+        data = parse_fda_response(response)
+        if 'results' in data and data['results']:
+            # Extract common adverse reactions
+            reactions = []
+            for reaction in data['results'][:5]:  # Top 5 reactions
+                reactions.append(reaction['term'])
             
-            # Others
-            "Fever of unknown origin", "Pain management", "Palliative care",
-            "Immunization reactions", "Poisoning/Overdose", "Burns"
-        ]
+            result = {
+                'found': True,
+                'reactions': reactions,
+                'source': 'OpenFDA Adverse Events Database'
+            }
+    
+    write_fda_disk_cache(disk_key, result)
+    return result
+
+@st.cache_resource(show_spinner=False)
+def get_fda_unreported_drugs():
+    """Drugs OpenFDA has no adverse event reports for, mapped to when that was last seen"""
+    return {}
+
+@st.cache_data(ttl=86400, max_entries=2048, show_spinner=False)
+def fetch_fda_coreported(drug_norm):
+    """Fetch the products co-reported with a normalized drug in adverse events (cached for a day)"""
+    params = {
+        'search': f'patient.drug.medicinalproduct:"{drug_norm}"',
+        'count': 'patient.drug.medicinalproduct.exact',
+        'limit': OPENFDA_COUNT_LIMIT
+    }
+    
+    response = get_fda_session().get(OPENFDA_ADVERSE_EVENTS_URL, params=params, timeout=OPENFDA_TIMEOUT)
+    
+    if response.status_code == 404:
+        return {'products': [], 'complete': True}
+    response.raise_for_status()
+    
+    results = parse_fda_response(response).get('results', [])
+    return {
+        'products': [result['term'].lower() for result in results],
+        # A list shorter than the count limit holds every co-reported product
+        'complete': len(results) < OPENFDA_COUNT_LIMIT
+    }
+
+@st.cache_data(ttl=86400, max_entries=2048, show_spinner=False)
+def fetch_fda_label(drug_norm):
+    """Fetch interaction-related sections of a drug label (cached for a day)"""
+    params = {
+        'search': f'openfda.brand_name:"{drug_norm}" OR openfda.generic_name:"{drug_norm}"',
+        'limit': 1
+    }
+    
+    response = get_fda_session().get(OPENFDA_DRUG_LABELS_URL, params=params, timeout=OPENFDA_TIMEOUT)
+    
+    if response.status_code == 404:
+        return []
+    response.raise_for_status()
+    
+    data = parse_fda_response(response)
+    if 'results' in data and data['results']:
+        label_data = data['results'][0]
+        
+        # Extract interaction information from various label sections
+        interactions_info = []
+        
+        # Check drug interactions section
+        if 'drug_interactions' in label_data:
+            interactions_info.extend(label_data['drug_interactions'])
+        
+        # Check contraindications
+        if 'contraindications' in label_data:
+            interactions_info.extend(label_data['contraindications'])
+        
+        # Check warnings and precautions
+        if 'warnings_and_cautions' in label_data:
+            interactions_info.extend(label_data['warnings_and_cautions'])
+        
+        return interactions_info
+    
+    return []
 
 class OpenFDAAPI:
     def __init__(self):
-        self.base_url = "https://api.fda.gov/drug"
-        self.adverse_events_url = f"{self.base_url}/event.json"
-        self.drug_labels_url = f"{self.base_url}/label.json"
+        self.base_url = OPENFDA_BASE_URL
+        self.adverse_events_url = OPENFDA_ADVERSE_EVENTS_URL
+        self.drug_labels_url = OPENFDA_DRUG_LABELS_URL
+        self.critical_interactions = self._load_critical_interactions()
         
     def normalize_drug_name(self, drug_name):
         """Normalize drug name for API search"""
@@ -511,171 +584,132 @@ class OpenFDAAPI:
     def search_drug_interactions_fda(self, drug1, drug2):
         """Search for drug interactions using OpenFDA API"""
         try:
-            # Normalize drug names
+            # Normalize and order drug names so both orderings share one cache entry
             drug1_norm = self.normalize_drug_name(drug1)
             drug2_norm = self.normalize_drug_name(drug2)
+            if drug2_norm < drug1_norm:
+                drug1_norm, drug2_norm = drug2_norm, drug1_norm
+            return fetch_fda_interactions(drug1_norm, drug2_norm)
             
-            # Search for adverse events involving both drugs
-            search_query = f'patient.drug.medicinalproduct:"{drug1_norm}"+AND+patient.drug.medicinalproduct:"{drug2_norm}"'
-            
-            params = {
-                'search': search_query,
-                'count': 'patient.reaction.reactionmeddrapt.exact',
-                'limit': 10
-            }
-            
-            response = requests.get(self.adverse_events_url, params=params, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if 'results' in data and data['results']:
-                    # Extract common adverse reactions
-                    reactions = []
-                    for result in data['results'][:5]:  # Top 5 reactions
-                        reactions.append(result['term'])
-                    
-                    return {
-                        'found': True,
-                        'reactions': reactions,
-                        'source': 'OpenFDA Adverse Events Database'
-                    }
-            
-            return {'found': False}
-            
-        except Exception as e:
-            print(f"OpenFDA API error: {e}")
+        except requests.RequestException as e:
+            logger.warning("OpenFDA API error for %s + %s: %s", drug1, drug2, e)
             return {'found': False}
     
+    def is_known_unreported(self, drug_norm):
+        """Check whether a normalized drug was seen with no adverse event reports in the past week"""
+        seen_at = get_fda_unreported_drugs().get(drug_norm)
+        return seen_at is not None and time.time() - seen_at < OPENFDA_UNREPORTED_TTL
+    
+    def get_coreported_products(self, drug_norm):
+        """Get products co-reported with a normalized drug, or None if OpenFDA is unavailable"""
+        # A drug with no reports at all (e.g. ORS) is remembered for a week, not just a day
+        if self.is_known_unreported(drug_norm):
+            return {'products': [], 'complete': True}
+        
+        try:
+            coreported = fetch_fda_coreported(drug_norm)
+        except requests.RequestException as e:
+            logger.warning("OpenFDA API error for %s: %s", drug_norm, e)
+            return None
+        
+        if coreported['complete'] and not coreported['products']:
+            get_fda_unreported_drugs()[drug_norm] = time.time()
+        return coreported
+    
+    def may_be_coreported(self, coreported, drug1_norm, drug2_norm):
+        """Check whether two normalized drugs can appear together in adverse event reports"""
+        for drug_norm, other_norm in ((drug1_norm, drug2_norm), (drug2_norm, drug1_norm)):
+            products = coreported.get(drug_norm)
+            # Only a complete co-report list can prove the pair was never reported
+            if products and products['complete']:
+                if not any(other_norm in product for product in products['products']):
+                    return False
+        return True
+    
     def search_drug_labels_for_interactions(self, drug_name):
         """Search drug labels for interaction information"""
         try:
-            drug_norm = self.normalize_drug_name(drug_name)
-            
-            params = {
-                'search': f'openfda.brand_name:"{drug_norm}" OR openfda.generic_name:"{drug_norm}"',
-                'limit': 1
-            }
-            
-            response = requests.get(self.drug_labels_url, params=params, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if 'results' in data and data['results']:
-                    label_data = data['results'][0]
-                    
-                    # Extract interaction information from various label sections
-                    interactions_info = []
-                    
-                    # Check drug interactions section
-                    if 'drug_interactions' in label_data:
-                        interactions_info.extend(label_data['drug_interactions'])
-                    
-                    # Check contraindications
-                    if 'contraindications' in label_data:
-                        interactions_info.extend(label_data['contraindications'])
-                    
-                    # Check warnings and precautions
-                    if 'warnings_and_cautions' in label_data:
-                        interactions_info.extend(label_data['warnings_and_cautions'])
-                    
-                    return interactions_info
-            
-            return []
+            return fetch_fda_label(self.normalize_drug_name(drug_name))
             
-        except Exception as e:
-            print(f"Drug labels API error: {e}")
+        except requests.RequestException as e:
+            logger.warning("Drug labels API error for %s: %s", drug_name, e)
             return []
 
+    def _load_critical_interactions(self):
+        """Known critical interactions database (for immediate results)"""
+        return CRITICAL_INTERACTIONS
+
     def check_drug_interactions(self, medications):
         """Check for drug-drug interactions using OpenFDA API and known interactions"""
         interactions = []
         
-        # Known critical interactions database (for immediate results)
-        critical_interactions = {
-            ("warfarin", "aspirin"): {
-                "severity": "Major",
-                "mechanism": "Increased bleeding risk due to additive antiplatelet and anticoagulant effects",
-                "management": "Avoid concurrent use or monitor closely with frequent INR checks and bleeding assessment",
-                "clinical_significance": "High risk of major bleeding events"
-            },
-            ("digoxin", "amiodarone"): {
-                "severity": "Major",
-                "mechanism": "Amiodarone inhibits P-glycoprotein, increasing digoxin serum levels up to 2-fold",
-                "management": "Reduce digoxin dose by 50% and monitor serum digoxin levels closely",
-                "clinical_significance": "Risk of digoxin toxicity with cardiac arrhythmias"
-            },
-            ("phenytoin", "carbamazepine"): {
-                "severity": "Major",
-                "mechanism": "Mutual induction of hepatic enzymes leading to decreased efficacy of both drugs",
-                "management": "Monitor seizure control and consider dose adjustments or alternative therapy",
-                "clinical_significance": "Loss of seizure control in epileptic patients"
-            },
-            ("methotrexate", "trimethoprim"): {
-                "severity": "Major", 
-                "mechanism": "Both drugs inhibit folate metabolism, leading to additive bone marrow suppression",
-                "management": "Avoid combination or increase folate supplementation with close monitoring",
-                "clinical_significance": "Severe pancytopenia and immunosuppression"
-            },
-            ("theophylline", "ciprofloxacin"): {
-                "severity": "Major",
-                "mechanism": "Ciprofloxacin inhibits CYP1A2, reducing theophylline clearance by up to 30%",
-                "management": "Reduce theophylline dose by 50% and monitor serum levels",
-                "clinical_significance": "Risk of theophylline toxicity with seizures and cardiac arrhythmias"
-            },
-            ("insulin", "corticosteroids"): {
-                "severity": "Moderate",
-                "mechanism": "Corticosteroids increase blood glucose through gluconeogenesis and insulin resistance",
-                "management": "Monitor blood glucose closely and adjust insulin dosing as needed",
-                "clinical_significance": "Loss of glycemic control in diabetic patients"
-            },
-            ("acetaminophen", "warfarin"): {
-                "severity": "Moderate",
-                "mechanism": "High-dose acetaminophen may enhance anticoagulant effect of warfarin",
-                "management": "Limit acetaminophen to <2g/day and monitor INR more frequently",
-                "clinical_significance": "Increased bleeding risk with chronic high-dose use"
-            },
-            ("omeprazole", "clopidogrel"): {
-                "severity": "Moderate",
-                "mechanism": "Omeprazole inhibits CYP2C19, reducing conversion of clopidogrel to active metabolite",
-                "management": "Consider alternative PPI (pantoprazole) or H2 blocker",
-                "clinical_significance": "Reduced antiplatelet effect increasing cardiovascular risk"
-            }
-        }
+        # Normalize each medication once instead of once per pair
+        normalized = [self.normalize_drug_name(med) for med in medications]
+        
+        # Check all medication pairs against known critical interactions first,
+        # keeping one slot per pair so results stay in pair order
+        pairs_to_query = []
+        for i, j in combinations(range(len(medications)), 2):
+            # Check critical interactions first
+            name1, name2 = normalized[i], normalized[j]
+            pair = (name1, name2) if name1 <= name2 else (name2, name1)
+            found_interaction = self.critical_interactions.get(pair)
+            
+            if found_interaction:
+                interactions.append({
+                    "drug1": medications[i],
+                    "drug2": medications[j],
+                    "severity": found_interaction["severity"],
+                    "mechanism": found_interaction["mechanism"],
+                    "management": found_interaction["management"],
+                    "clinical_significance": found_interaction["clinical_significance"],
+                    "reference": "Clinical pharmacology database and FDA drug labels"
+                })
+            else:
+                interactions.append(None)
+                pairs_to_query.append((len(interactions) - 1, i, j))
+        
+        # Drugs already known to have no reports rule out their pairs with a dict
+        # probe, whether or not the co-report round below runs
+        pairs_to_query = [
+            (slot, i, j) for slot, i, j in pairs_to_query
+            if not (self.is_known_unreported(normalized[i]) or self.is_known_unreported(normalized[j]))
+        ]
+        if not pairs_to_query:
+            return [interaction for interaction in interactions if interaction]
         
-        # Check all medication pairs
-        for i, med1 in enumerate(medications):
-            for j, med2 in enumerate(medications[i+1:], i+1):
-                
-                # Check critical interactions first
-                pair1 = tuple(sorted([self.normalize_drug_name(med1), self.normalize_drug_name(med2)]))
-                pair2 = (self.normalize_drug_name(med1), self.normalize_drug_name(med2))
-                pair3 = (self.normalize_drug_name(med2), self.normalize_drug_name(med1))
-                
-                found_interaction = None
-                for pair in [pair1, pair2, pair3]:
-                    if pair in critical_interactions:
-                        found_interaction = critical_interactions[pair]
-                        break
-                
-                if found_interaction:
-                    interactions.append({
-                        "drug1": med1,
-                        "drug2": med2,
-                        "severity": found_interaction["severity"],
-                        "mechanism": found_interaction["mechanism"],
-                        "management": found_interaction["management"],
-                        "clinical_significance": found_interaction["clinical_significance"],
-                        "reference": "Clinical pharmacology database and FDA drug labels"
-                    })
-                else:
-                    # Search OpenFDA API for potential interactions
-                    fda_result = self.search_drug_interactions_fda(med1, med2)
+        # One pool serves every OpenFDA round below, so the per-drug probes run
+        # concurrently too instead of one request after another
+        executor = ThreadPoolExecutor(max_workers=OPENFDA_MAX_WORKERS)
+        try:
+            # One co-report lookup per drug rules out pairs never reported together,
+            # including every pair of a drug with no reports at all, so only the
+            # remaining pairs need their own adverse event query. That extra round
+            # only pays off when there are more pairs left than distinct drugs.
+            drugs_to_query = list({normalized[k] for _, i, j in pairs_to_query for k in (i, j)})
+            if len(pairs_to_query) > len(drugs_to_query):
+                coreported = dict(zip(drugs_to_query, executor.map(self.get_coreported_products, drugs_to_query)))
+                pairs_to_query = [
+                    (slot, i, j) for slot, i, j in pairs_to_query
+                    if self.may_be_coreported(coreported, normalized[i], normalized[j])
+                ]
+            
+            # Search OpenFDA API for the remaining pairs concurrently over the pooled session
+            futures = {
+                executor.submit(self.search_drug_interactions_fda, medications[i], medications[j]):
+                    (slot, medications[i], medications[j])
+                for slot, i, j in pairs_to_query
+            }
+            try:
+                for future in as_completed(futures, timeout=OPENFDA_LOOKUP_TIMEOUT):
+                    slot, med1, med2 = futures[future]
+                    fda_result = future.result()
                     
                     if fda_result.get('found'):
                         # Create interaction based on FDA adverse events data
                         reactions = fda_result.get('reactions', [])
                         if reactions:
-                            interactions.append({
+                            interactions[slot] = {
                                 "drug1": med1,
                                 "drug2": med2,
                                 "severity": "Monitor",
@@ -683,33 +717,90 @@ class OpenFDAAPI:
                                 "management": "Monitor patient closely for unusual symptoms or side effects",
                                 "clinical_significance": "Interaction reported in FDA adverse events database",
                                 "reference": f"OpenFDA Adverse Events Database - {fda_result['source']}"
-                            })
+                            }
+            except FuturesTimeoutError:
+                logger.warning("OpenFDA interaction lookups timed out, showing partial results")
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
         
-        return interactions
+        return [interaction for interaction in interactions if interaction]
 
-def generate_pdf_report(patient_age, indication, medications, inappropriate_meds, omissions, interactions):
-    """Generate PDF report of screening results"""
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    styles = getSampleStyleSheet()
-    story = []
+@st.cache_resource
+def get_fda_api():
+    """Build the OpenFDA client once per process; it holds no per-session state"""
+    return OpenFDAAPI()
+
+@st.cache_resource(show_spinner=False)
+def get_pdf_styles():
+    """Build the report stylesheet once per process and reuse it for every report"""
+    # reportlab is imported by the PDF functions so sessions that never build a report skip it
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
     
-    # Title
-    title_style = ParagraphStyle(
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(
         'CustomTitle',
         parent=styles['Heading1'],
         fontSize=24,
         textColor='#667eea',
         alignment=1,  # Center alignment
         spaceAfter=20
+    ))
+    # Field labels carry their weight in the style, so no inline <b> markup is parsed per field
+    styles.add(ParagraphStyle(
+        'FieldLabel',
+        parent=styles['Normal'],
+        fontName='Helvetica-Bold'
+    ))
+    styles.add(ParagraphStyle(
+        'ResultLabel',
+        parent=styles['Normal'],
+        fontName='Helvetica-Oblique'
+    ))
+    return styles
+
+def pdf_field_table(fields, styles, title=None, label_style='FieldLabel', space_after=0):
+    """Lay out (label, value) pairs, under an optional title row, as one two-column flowable"""
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Paragraph, Table, TableStyle
+    
+    rows = []
+    table_style = [
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ('LEFTPADDING', (0, 0), (-1, -1), 0),
+        ('TOPPADDING', (0, 0), (-1, -1), 1),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 1)
+    ]
+    if title is not None:
+        rows.append([Paragraph(escape(title), styles['Normal']), ''])
+        table_style.append(('SPAN', (0, 0), (-1, 0)))
+    rows.extend(
+        [Paragraph(f"{label}:", styles[label_style]), Paragraph(escape(str(value)), styles['Normal'])]
+        for label, value in fields
     )
-    story.append(Paragraph("🛡️ PediaSafeAI Screening Report", title_style))
+    table = Table(rows, colWidths=[1.6 * inch, None], hAlign='LEFT', spaceAfter=space_after)
+    table.setStyle(TableStyle(table_style))
+    return table
+
+def generate_pdf_report(patient_age, indication, medications, inappropriate_meds, omissions, interactions):
+    """Generate PDF report of screening results as bytes"""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+    
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    styles = get_pdf_styles()
+    story = []
+    
+    # Title
+    story.append(Paragraph("🛡️ PediaSafeAI Screening Report", styles['CustomTitle']))
     
     # Report details
-    story.append(Paragraph(f"<b>Date:</b> {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", styles['Normal']))
-    story.append(Paragraph(f"<b>Patient Age:</b> {patient_age}", styles['Normal']))
-    story.append(Paragraph(f"<b>Indication:</b> {indication}", styles['Normal']))
-    story.append(Paragraph(f"<b>Medications:</b> {', '.join(medications)}", styles['Normal']))
+    story.append(pdf_field_table([
+        ("Date", datetime.now().strftime('%Y-%m-%d %H:%M:%S')),
+        ("Patient Age", patient_age),
+        ("Indication", indication),
+        ("Medications", ', '.join(medications))
+    ], styles))
     story.append(Spacer(1, 20))
     
     # Results sections
@@ -722,21 +813,26 @@ def generate_pdf_report(patient_age, indication, medications, inappropriate_meds
     for section_title, results in sections:
         story.append(Paragraph(section_title, styles['Heading2']))
         if results:
+            # One table flowable per finding instead of a paragraph per field
             if section_title == "Drug-Drug Interactions":
                 for result in results:
-                    story.append(Paragraph(f"• {result.get('drug1', 'N/A')} ↔ {result.get('drug2', 'N/A')} ({result.get('severity', 'Unknown')} Interaction)", styles['Normal']))
-                    story.append(Paragraph(f"  <i>Mechanism:</i> {result.get('mechanism', 'N/A')}", styles['Normal']))
-                    story.append(Paragraph(f"  <i>Management:</i> {result.get('management', 'N/A')}", styles['Normal']))
+                    fields = [
+                        ("Mechanism", result.get('mechanism', 'N/A')),
+                        ("Management", result.get('management', 'N/A'))
+                    ]
                     if result.get('clinical_significance'):
-                        story.append(Paragraph(f"  <i>Clinical Significance:</i> {result.get('clinical_significance')}", styles['Normal']))
-                    story.append(Paragraph(f"  <i>Reference:</i> {result.get('reference', 'N/A')}", styles['Normal']))
-                    story.append(Spacer(1, 10))
+                        fields.append(("Clinical Significance", result.get('clinical_significance')))
+                    fields.append(("Reference", result.get('reference', 'N/A')))
+                    title = f"• {result.get('drug1', 'N/A')} ↔ {result.get('drug2', 'N/A')} ({result.get('severity', 'Unknown')} Interaction)"
+                    story.append(pdf_field_table(fields, styles, title=title, label_style='ResultLabel', space_after=10))
             else:
                 for result in results:
-                    story.append(Paragraph(f"• {result.get('medication', result.get('missing_medication', 'N/A'))}", styles['Normal']))
-                    story.append(Paragraph(f"  <i>Rationale:</i> {result.get('rationale', 'N/A')}", styles['Normal']))
-                    story.append(Paragraph(f"  <i>Reference:</i> {result.get('reference', 'N/A')}", styles['Normal']))
-                    story.append(Spacer(1, 10))
+                    fields = [
+                        ("Rationale", result.get('rationale', 'N/A')),
+                        ("Reference", result.get('reference', 'N/A'))
+                    ]
+                    title = f"• {result.get('medication', result.get('missing_medication', 'N/A'))}"
+                    story.append(pdf_field_table(fields, styles, title=title, label_style='ResultLabel', space_after=10))
         else:
             story.append(Paragraph("No issues identified.", styles['Normal']))
         story.append(Spacer(1, 15))
@@ -746,336 +842,322 @@ def generate_pdf_report(patient_age, indication, medications, inappropriate_meds
     story.append(Paragraph("Developed for pediatric medication safety • Always consult healthcare professionals for clinical decisions", styles['Normal']))
     
     doc.build(story)
-    buffer.seek(0)
-    return buffer
+    return buffer.getvalue()
 
-def main():
-    # Initialize databases
-    if 'drug_db' not in st.session_state:
-        st.session_state.drug_db = PediatricDrugDatabase()
-        st.session_state.fda_api = OpenFDAAPI()
+@st.cache_resource
+def get_pdf_executor():
+    """Shared worker that builds PDF reports off the script thread"""
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="pdf-report")
+
+def start_pdf_report(results):
+    """Queue the PDF report for a screening result and return its future"""
+    return get_pdf_executor().submit(
+        generate_pdf_report,
+        results['patient_age'],
+        results['indication'],
+        results['medications'],
+        results['inappropriate_meds'],
+        results['omissions'],
+        results['interactions']
+    )
+
+# Static page markup, kept at module level so the render functions only pass it through
+LANDING_HTML = """
+<div class="main-header">
+    <div class="app-title">🛡️ PediaSafeAI</div>
+    <div class="credentials">by Ayesha Bibi, MPhil Pharmacy Practice Student (GCUF)</div>
+    <div class="description">
+        An AI-driven clinical decision support system designed to screen pediatric prescriptions 
+        for inappropriate use, omissions, and drug interactions to ensure safer pharmacotherapy.
+    </div>
+</div>
+"""
+
+APP_HEADER_HTML = """
+<div style="text-align: center; padding: 1rem 0; margin-bottom: 2rem;">
+    <h1>🛡️ PediaSafeAI</h1>
+    <p style="font-style: italic; color: #666;">by Ayesha Bibi, MPhil Pharmacy Practice Student (GCUF)</p>
+    <p style="color: #888; max-width: 600px; margin: 0 auto;">
+        An AI-driven clinical decision support system designed to screen pediatric prescriptions 
+        for inappropriate use, omissions, and drug interactions to ensure safer pharmacotherapy.
+    </p>
+</div>
+"""
+
+RESULTS_HEADER_HTML = '<div class="screening-results-header">📊 Screening Results</div>'
+
+# Expander marker per interaction severity; anything else is shown as a monitor-level finding
+SEVERITY_EMOJI = {"Major": "🔴", "Moderate": "🟡"}
+
+FOOTER_HTML = """
+<div class="footer">
+    <p><strong>Developed for pediatric medication safety • Always consult healthcare professionals for clinical decisions</strong></p>
+</div>
+"""
+
+DISCLAIMER_HTML = """
+<div class="disclaimer-content">
+    <p><strong>Important Medical Disclaimer:</strong></p>
+    <ul>
+        <li>This tool is for educational and screening purposes only</li>
+        <li>It does not replace clinical judgment or professional medical advice</li>
+        <li>Always consult with qualified healthcare professionals before making treatment decisions</li>
+        <li>The databases and criteria used may not be exhaustive</li>
+        <li>Individual patient factors must always be considered</li>
+        <li>This application integrates POPI, PIPc, and KIDs list criteria for comprehensive screening</li>
+        <li>Drug interaction data is sourced from established pharmaceutical databases</li>
+    </ul>
+    <p><em>Developed for pediatric medication safety • Always consult healthcare professionals for clinical decisions</em></p>
+</div>
+"""
+
+@st.fragment
+def render_results(results):
+    """Display screening results; widget clicks here rerun only this fragment"""
+    # Centered header with better spacing
+    st.markdown(RESULTS_HEADER_HTML, unsafe_allow_html=True)
+    
+    # Summary metrics with proper spacing
+    with st.container(key="metrics-container"):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Inappropriate Prescriptions", len(results['inappropriate_meds']))
+        with col2:
+            st.metric("Prescription Omissions", len(results['omissions']))
+        with col3:
+            st.metric("Drug Interactions", len(results['interactions']))
+    
+    # Detailed results with better spacing
+    with st.container(key="tabs-container"):
+        tabs = st.tabs(["Inappropriate Prescriptions", "Prescription Omissions", "Drug Interactions"])
+        
+        # Each expander body is one markdown element rather than one per field
+        with tabs[0]:
+            if results['inappropriate_meds']:
+                for med in results['inappropriate_meds']:
+                    with st.expander(f"🚨 {med['medication']} - {med['age_restriction']} | {med['condition']}"):
+                        st.markdown(
+                            f"**Rationale:** {med['rationale']}\n\n"
+                            f"**Reference:** {med['reference']}"
+                        )
+            else:
+                st.success("✅ No inappropriate prescriptions identified.")
+        
+        with tabs[1]:
+            if results['omissions']:
+                for omission in results['omissions']:
+                    with st.expander(f"⚠️ Missing: {omission['missing_medication']}"):
+                        st.markdown(
+                            f"**For condition:** {omission['condition']}\n\n"
+                            f"**Rationale:** {omission['rationale']}\n\n"
+                            f"**Reference:** {omission['reference']}"
+                        )
+            else:
+                st.success("✅ No prescription omissions identified.")
+        
+        with tabs[2]:
+            if results['interactions']:
+                for interaction in results['interactions']:
+                    severity = interaction['severity']
+                    with st.expander(f"{SEVERITY_EMOJI.get(severity, '🔵')} {interaction['drug1']} ↔ {interaction['drug2']} | {severity} Interaction"):
+                        details = [
+                            f"**Mechanism:** {interaction['mechanism']}",
+                            f"**Clinical Management:** {interaction['management']}"
+                        ]
+                        if 'clinical_significance' in interaction:
+                            details.append(f"**Clinical Significance:** {interaction['clinical_significance']}")
+                        details.append(f"**Reference:** {interaction['reference']}")
+                        st.markdown("\n\n".join(details))
+                        
+                        # Add severity-based styling
+                        if severity == "Major":
+                            st.error("⚠️ **MAJOR INTERACTION** - Immediate clinical attention required")
+                        elif severity == "Moderate":
+                            st.warning("⚡ **MODERATE INTERACTION** - Close monitoring recommended")
+                        else:
+                            st.info("👁️ **MONITOR** - Watch for potential effects")
+            else:
+                st.success("✅ No drug interactions identified.")
     
+    # Download PDF report with better spacing and styling
+    with st.container(key="download-section"):
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col2:
+            # The report is queued when screening finishes; only wait on it here
+            if st.session_state.pdf_report is None:
+                st.session_state.pdf_report = start_pdf_report(results)
+        
+            st.download_button(
+                label="📄 Download PDF Report",
+                data=st.session_state.pdf_report.result(),
+                file_name=f"PediaSafeAI_Report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
+                mime="application/pdf",
+                type="primary",
+                use_container_width=True
+            )
+        
+            if st.button("🔄 New Screening", type="secondary", use_container_width=True):
+                st.session_state.screening_done = False
+                # Leaving the results view needs a full app rerun, not just this fragment
+                st.rerun(scope="app")
+
+def enter_app():
+    """Leave the landing page"""
+    st.session_state.show_app = True
+
+def main():
     # Initialize session state
     if 'show_app' not in st.session_state:
         st.session_state.show_app = False
     if 'screening_done' not in st.session_state:
         st.session_state.screening_done = False
+    if 'pdf_report' not in st.session_state:
+        st.session_state.pdf_report = None
 
     # Landing page
     if not st.session_state.show_app:
-        st.markdown("""
-        <div class="main-header">
-            <div class="app-title">🛡️ PediaSafeAI</div>
-            <div class="credentials">by Ayesha Bibi, MPhil Pharmacy Practice Student (GCUF)</div>
-            <div class="description">
-                An AI-driven clinical decision support system designed to screen pediatric prescriptions 
-                for inappropriate use, omissions, and drug interactions to ensure safer pharmacotherapy.
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(LANDING_HTML, unsafe_allow_html=True)
         
         col1, col2, col3 = st.columns([1, 2, 1])
         with col2:
-            if st.button("🚀 Enter Application", type="primary", use_container_width=True):
-                st.session_state.show_app = True
-                st.rerun()
+            # The callback flips the flag before the click's own rerun, so the app
+            # is drawn straight away instead of after a second script run
+            st.button("🚀 Enter Application", type="primary", use_container_width=True, on_click=enter_app)
     
     # Main application
     else:
+        # Initialize databases (deferred until the app is entered to keep the landing page fast)
+        drug_db = get_drug_db()
+        fda_api = get_fda_api()
+        
         # Header
-        st.markdown("""
-        <div style="text-align: center; padding: 1rem 0; margin-bottom: 2rem;">
-            <h1>🛡️ PediaSafeAI</h1>
-            <p style="font-style: italic; color: #666;">by Ayesha Bibi, MPhil Pharmacy Practice Student (GCUF)</p>
-            <p style="color: #888; max-width: 600px; margin: 0 auto;">
-                An AI-driven clinical decision support system designed to screen pediatric prescriptions 
-                for inappropriate use, omissions, and drug interactions to ensure safer pharmacotherapy.
-            </p>
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(APP_HEADER_HTML, unsafe_allow_html=True)
 
         if not st.session_state.screening_done:
-            # Input form - vertical layout with proper spacing
-            with st.form("screening_form"):
-                # Patient Information Section
-                st.markdown('<div class="input-section">', unsafe_allow_html=True)
-                st.markdown("### Patient Information")
-                
-                col1, col2 = st.columns(2)
-                with col1:
-                    age_unit = st.selectbox("Age Unit", ["Years", "Months"])
-                with col2:
-                    patient_age_value = st.number_input("Patient Age", min_value=0, value=5)
-                
-                patient_age = f"{patient_age_value} {age_unit.lower()}"
-                st.markdown('</div>', unsafe_allow_html=True)
-                
-                # Add vertical spacing
-                st.markdown("<br>", unsafe_allow_html=True)
-                
-                # Clinical Information Section
-                st.markdown('<div class="input-section">', unsafe_allow_html=True)
-                st.markdown("### Clinical Information")
-                
-                indication = st.selectbox(
-                    "Medical Condition/Indication",
-                    [""] + st.session_state.drug_db.common_conditions,
-                    help="Select the primary medical condition"
-                )
-                
-                # Option to add custom indication
-                custom_indication = st.text_input(
-                    "Add custom indication (if not in list above)",
-                    placeholder="Type custom medical condition here..."
-                )
-                
-                if custom_indication:
-                    indication = custom_indication
+            # The form sits in a placeholder so a completed screening can swap it
+            # for the results within the same script run
+            form_slot = st.empty()
+            with form_slot.container():
+                # Input form - vertical layout with proper spacing
+                with st.form("screening_form"):
+                    # Patient Information Section
+                    with st.container(key="patient-section"):
+                        st.markdown("### Patient Information")
+                    
+                        col1, col2 = st.columns(2)
+                        with col1:
+                            age_unit = st.selectbox("Age Unit", ["Years", "Months"])
+                        with col2:
+                            patient_age_value = st.number_input("Patient Age", min_value=0, value=5)
+                    
+                        patient_age = f"{patient_age_value} {age_unit.lower()}"
                     
-                st.markdown('</div>', unsafe_allow_html=True)
-                
-                # Add vertical spacing
-                st.markdown("<br>", unsafe_allow_html=True)
-                
-                # Current Medications Section
-                st.markdown('<div class="input-section">', unsafe_allow_html=True)
-                st.markdown("### Current Medications")
-                
-                selected_medications = st.multiselect(
-                    "Select medications (you can select multiple)",
-                    st.session_state.drug_db.common_medications,
-                    help="Select all current medications for the patient"
-                )
-                
-                # Option to add custom medications
-                custom_medications = st.text_area(
-                    "Add custom medications (if not in list above)",
-                    placeholder="Enter additional medications, separated by commas...",
-                    height=100
-                )
-                
-                # Process custom medications
-                if custom_medications:
-                    custom_med_list = [med.strip() for med in custom_medications.split(',') if med.strip()]
-                    selected_medications.extend(custom_med_list)
-                
-                st.markdown('</div>', unsafe_allow_html=True)
-                
-                # Add spacing before submit button
-                st.markdown("<br><br>", unsafe_allow_html=True)
-                
-                # Submit button with bold styling
-                submitted = st.form_submit_button(
-                    "**🔍 SCREEN PRESCRIPTION**", 
-                    type="primary", 
-                    use_container_width=True
-                )
-                
-                if submitted and selected_medications and indication:
-                    # Perform screening
-                    inappropriate_meds = []
-                    omissions = []
-                    interactions = st.session_state.fda_api.check_drug_interactions(selected_medications)
+                    # Clinical Information Section
+                    with st.container(key="clinical-section"):
+                        st.markdown("### Clinical Information")
                     
-                    # Check POPI criteria
-                    age_in_years = patient_age_value if age_unit == "Years" else patient_age_value / 12
+                        indication = st.selectbox(
+                            "Medical Condition/Indication",
+                            drug_db.condition_options,
+                            help="Select the primary medical condition"
+                        )
                     
-                    for med in selected_medications:
-                        # Check POPI criteria
-                        for criteria in st.session_state.drug_db.popi_criteria["inappropriate"]:
-                            if criteria["medication"].lower() in med.lower():
-                                if check_age_restriction(criteria["age_restriction"], age_in_years):
-                                    inappropriate_meds.append(criteria)
+                        # Option to add custom indication
+                        custom_indication = st.text_input(
+                            "Add custom indication (if not in list above)",
+                            placeholder="Type custom medical condition here..."
+                        )
+                    
+                        if custom_indication.strip():
+                            indication = drug_db.canonical_condition(custom_indication.strip())
                         
-                        # Check KIDs list criteria
-                        for criteria in st.session_state.drug_db.kids_list["inappropriate"]:
-                            if criteria["medication"].lower() in med.lower():
-                                if check_age_restriction(criteria["age_restriction"], age_in_years):
-                                    inappropriate_meds.append(criteria)
                     
-                    # Check for omissions (PIPc criteria)
-                    for omission in st.session_state.drug_db.pipc_criteria["omissions"]:
-                        if omission["condition"].lower() in indication.lower():
-                            # Check if the required medication is not in the list
-                            required_med_found = any(
-                                any(req_med.lower() in med.lower() for req_med in omission["missing_medication"].split(" or "))
-                                for med in selected_medications
-                            )
-                            if not required_med_found:
-                                omissions.append(omission)
+                    # Current Medications Section
+                    with st.container(key="medications-section"):
+                        st.markdown("### Current Medications")
+                    
+                        selected_medications = st.multiselect(
+                            "Select medications (you can select multiple)",
+                            drug_db.common_medications,
+                            help="Select all current medications for the patient"
+                        )
+                    
+                        # Option to add custom medications
+                        custom_medications = st.text_area(
+                            "Add custom medications (if not in list above)",
+                            placeholder="Enter additional medications, separated by commas...",
+                            height=100
+                        )
+                    
+                        # Process custom medications, matching listed names so duplicates are dropped
+                        if custom_medications:
+                            already_selected = set(selected_medications)
+                            for med in custom_medications.split(','):
+                                med = drug_db.canonical_medication(med.strip())
+                                if med and med not in already_selected:
+                                    selected_medications.append(med)
+                                    already_selected.add(med)
                     
-                    # Store results in session state
-                    st.session_state.screening_results = {
-                        'patient_age': patient_age,
-                        'indication': indication,
-                        'medications': selected_medications,
-                        'inappropriate_meds': inappropriate_meds,
-                        'omissions': omissions,
-                        'interactions': interactions
-                    }
-                    st.session_state.screening_done = True
-                    st.rerun()
-                elif submitted:
-                    if not selected_medications:
-                        st.error("⚠️ Please select at least one medication.")
-                    if not indication:
-                        st.error("⚠️ Please select a medical condition.")
+                    
+                    # Submit button with bold styling
+                    submitted = st.form_submit_button(
+                        "**🔍 SCREEN PRESCRIPTION**", 
+                        type="primary", 
+                        use_container_width=True
+                    )
+                    
+                    if submitted and selected_medications and indication:
+                        # Perform screening
+                        interactions = fda_api.check_drug_interactions(selected_medications)
+                        
+                        # Check POPI and KIDs list criteria
+                        age_in_years = patient_age_value if age_unit == "Years" else patient_age_value / 12
+                        inappropriate_meds = drug_db.find_inappropriate(selected_medications, age_in_years)
+                        
+                        # Check for omissions (PIPc criteria)
+                        omissions = drug_db.find_omissions(indication, selected_medications)
+                        
+                        # Store results in session state
+                        st.session_state.screening_results = {
+                            'patient_age': patient_age,
+                            'indication': indication,
+                            'medications': selected_medications,
+                            'inappropriate_meds': inappropriate_meds,
+                            'omissions': omissions,
+                            'interactions': interactions
+                        }
+                        st.session_state.pdf_report = start_pdf_report(st.session_state.screening_results)
+                        st.session_state.screening_done = True
+                    elif submitted:
+                        if not selected_medications:
+                            st.error("⚠️ Please select at least one medication.")
+                        if not indication:
+                            st.error("⚠️ Please select a medical condition.")
+            if st.session_state.screening_done:
+                form_slot.empty()
         
-        else:
+        if st.session_state.screening_done:
             # Display results with improved layout and spacing
-            results = st.session_state.screening_results
-            
-            # Centered header with better spacing
-            st.markdown('<div class="screening-results-header">📊 Screening Results</div>', unsafe_allow_html=True)
-            
-            # Summary metrics with proper spacing
-            st.markdown('<div class="metrics-container">', unsafe_allow_html=True)
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.metric("Inappropriate Prescriptions", len(results['inappropriate_meds']))
-            with col2:
-                st.metric("Prescription Omissions", len(results['omissions']))
-            with col3:
-                st.metric("Drug Interactions", len(results['interactions']))
-            st.markdown('</div>', unsafe_allow_html=True)
-            
-            # Add spacing before tabs
-            st.markdown("<br><br>", unsafe_allow_html=True)
-            
-            # Detailed results with better spacing
-            st.markdown('<div class="tabs-container">', unsafe_allow_html=True)
-            tabs = st.tabs(["Inappropriate Prescriptions", "Prescription Omissions", "Drug Interactions"])
-            
-            with tabs[0]:
-                st.markdown("<br>", unsafe_allow_html=True)
-                if results['inappropriate_meds']:
-                    for i, med in enumerate(results['inappropriate_meds']):
-                        with st.expander(f"🚨 {med['medication']} - {med['age_restriction']} | {med['condition']}"):
-                            st.markdown(f"**Rationale:** {med['rationale']}")
-                            st.markdown(f"**Reference:** {med['reference']}")
-                        if i < len(results['inappropriate_meds']) - 1:
-                            st.markdown("<br>", unsafe_allow_html=True)
-                else:
-                    st.success("✅ No inappropriate prescriptions identified.")
-            
-            with tabs[1]:
-                st.markdown("<br>", unsafe_allow_html=True)
-                if results['omissions']:
-                    for i, omission in enumerate(results['omissions']):
-                        with st.expander(f"⚠️ Missing: {omission['missing_medication']}"):
-                            st.markdown(f"**For condition:** {omission['condition']}")
-                            st.markdown(f"**Rationale:** {omission['rationale']}")
-                            st.markdown(f"**Reference:** {omission['reference']}")
-                        if i < len(results['omissions']) - 1:
-                            st.markdown("<br>", unsafe_allow_html=True)
-                else:
-                    st.success("✅ No prescription omissions identified.")
-            
-            with tabs[2]:
-                st.markdown("<br>", unsafe_allow_html=True)
-                if results['interactions']:
-                    for i, interaction in enumerate(results['interactions']):
-                        severity_emoji = "🔴" if interaction['severity'] == "Major" else "🟡" if interaction['severity'] == "Moderate" else "🔵"
-                        with st.expander(f"{severity_emoji} {interaction['drug1']} ↔ {interaction['drug2']} | {interaction['severity']} Interaction"):
-                            st.markdown(f"**Mechanism:** {interaction['mechanism']}")
-                            st.markdown(f"**Clinical Management:** {interaction['management']}")
-                            if 'clinical_significance' in interaction:
-                                st.markdown(f"**Clinical Significance:** {interaction['clinical_significance']}")
-                            st.markdown(f"**Reference:** {interaction['reference']}")
-                            
-                            # Add severity-based styling
-                            if interaction['severity'] == "Major":
-                                st.error("⚠️ **MAJOR INTERACTION** - Immediate clinical attention required")
-                            elif interaction['severity'] == "Moderate":
-                                st.warning("⚡ **MODERATE INTERACTION** - Close monitoring recommended")
-                            else:
-                                st.info("👁️ **MONITOR** - Watch for potential effects")
-                        
-                        if i < len(results['interactions']) - 1:
-                            st.markdown("<br>", unsafe_allow_html=True)
-                else:
-                    st.success("✅ No drug interactions identified.")
-            
-            st.markdown('</div>', unsafe_allow_html=True)
-            
-            # Download PDF report with better spacing and styling
-            st.markdown("<br><br>", unsafe_allow_html=True)
-            st.markdown('<div class="download-section">', unsafe_allow_html=True)
-            col1, col2, col3 = st.columns([1, 2, 1])
-            with col2:
-                pdf_buffer = generate_pdf_report(
-                    results['patient_age'],
-                    results['indication'],
-                    results['medications'],
-                    results['inappropriate_meds'],
-                    results['omissions'],
-                    results['interactions']
-                )
-                
-                st.download_button(
-                    label="📄 Download PDF Report",
-                    data=pdf_buffer.getvalue(),
-                    file_name=f"PediaSafeAI_Report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
-                    mime="application/pdf",
-                    type="primary",
-                    use_container_width=True
-                )
-                
-                st.markdown("<br>", unsafe_allow_html=True)
-                
-                if st.button("🔄 New Screening", type="secondary", use_container_width=True):
-                    st.session_state.screening_done = False
-                    st.rerun()
-            st.markdown('</div>', unsafe_allow_html=True)
+            render_results(st.session_state.screening_results)
         
         # Footer
-        st.markdown("""
-        <div class="footer">
-            <p><strong>Developed for pediatric medication safety • Always consult healthcare professionals for clinical decisions</strong></p>
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(FOOTER_HTML, unsafe_allow_html=True)
         
         # Centered Disclaimer
-        st.markdown('<div class="disclaimer-container">', unsafe_allow_html=True)
-        with st.expander("⚠️ Disclaimer"):
-            st.markdown("""
-            <div class="disclaimer-content">
-                <p><strong>Important Medical Disclaimer:</strong></p>
-                <ul>
-                    <li>This tool is for educational and screening purposes only</li>
-                    <li>It does not replace clinical judgment or professional medical advice</li>
-                    <li>Always consult with qualified healthcare professionals before making treatment decisions</li>
-                    <li>The databases and criteria used may not be exhaustive</li>
-                    <li>Individual patient factors must always be considered</li>
-                    <li>This application integrates POPI, PIPc, and KIDs list criteria for comprehensive screening</li>
-                    <li>Drug interaction data is sourced from established pharmaceutical databases</li>
-                </ul>
-                <p><em>Developed for pediatric medication safety • Always consult healthcare professionals for clinical decisions</em></p>
-            </div>
-            """, unsafe_allow_html=True)
-        st.markdown('</div>', unsafe_allow_html=True)
-
-def check_age_restriction(restriction, age_in_years):
-    """Helper function to check age restrictions"""
-    if "< 18 years" in restriction and age_in_years < 18:
-        return True
-    elif "< 16 years" in restriction and age_in_years < 16:
-        return True
-    elif "< 12 years" in restriction and age_in_years < 12:
-        return True
-    elif "< 8 years" in restriction and age_in_years < 8:
-        return True
-    elif "< 4 years" in restriction and age_in_years < 4:
-        return True
-    elif "< 2 years" in restriction and age_in_years < 2:
-        return True
-    elif "< 2 weeks" in restriction and age_in_years < (2/52):
-        return True
-    elif "< 6 months" in restriction and age_in_years < 0.5:
-        return True
-    elif "< 1 year" in restriction and age_in_years < 1:
-        return True
-    return False
+        with st.container(key="disclaimer-container"):
+            with st.expander("⚠️ Disclaimer"):
+                st.markdown(DISCLAIMER_HTML, unsafe_allow_html=True)
+
+# Age limits written as "< 16 years", "< 6 months" or "< 2 weeks", with unit sizes in years
+AGE_RESTRICTION_PATTERN = re.compile(r"<\s*(\d+(?:\.\d+)?)\s*(year|month|week)s?", re.IGNORECASE)
+AGE_UNITS_IN_YEARS = {"year": 1, "month": 1/12, "week": 1/52}
+
+def age_restriction_threshold(restriction):
+    """Return the age in years below which a restriction applies (NaN when it has none)"""
+    match = AGE_RESTRICTION_PATTERN.search(restriction)
+    if not match:
+        return float("nan")
+    return float(match.group(1)) * AGE_UNITS_IN_YEARS[match.group(2).lower()]
 
 if __name__ == "__main__":
     main()
@@ -21,7 +21,12 @@ def install_requirements():
 
 def check_files():
     """Check if all required files are present"""
-    required_files = ["app.py", "requirements.txt"]
+    required_files = [
+        "app.py",
+        "requirements.txt",
+        os.path.join("data", "criteria.json"),
+        os.path.join("static", "style.css")
+    ]
     missing_files = []
     
     for file in required_files:
@@ -56,6 +61,8 @@ def main():
     if not check_files():
         print("\n📥 Please ensure all files are in the same directory:")
         print("   - app.py")
+        print("   - data/criteria.json")
+        print("   - static/style.css")
         print("   - requirements.txt")
         print("   - setup.py (this file)")
         return